@@ -0,0 +1,152 @@
+import json
+import os
+
+import anthropic
+
+from src.agent.result_format import (
+    TOOL_TOKEN_BUDGETS,
+    compact_records,
+    compact_rows,
+    encode_result,
+    estimate_tokens,
+    schema_to_ddl,
+)
+
+# Large enough that no result is trimmed, to measure the encoding on its own
+UNLIMITED_BUDGET = 10**9
+
+def sample_schema():
+    """Schema rows shaped like the get_schema query output"""
+    columns = [
+        ("id", "uuid", "NO", "gen_random_uuid()", None),
+        ("organization_id", "uuid", "NO", None, "Owning organization"),
+        ("short_name", "text", "YES", None, None),
+        ("email", "text", "YES", None, None),
+        ("phone", "text", "YES", None, None),
+        ("belt_rank", "text", "YES", "'white'::text", "Current belt rank"),
+        ("created_at", "timestamp with time zone", "NO", "now()", None),
+    ]
+    return [
+        {
+            "table_name": f"table_{i}",
+            "table_description": None,
+            "columns": [
+                {
+                    "column_name": name,
+                    "data_type": data_type,
+                    "is_nullable": nullable,
+                    "column_default": default,
+                    "description": description,
+                }
+                for name, data_type, nullable, default, description in columns
+            ],
+        }
+        for i in range(12)
+    ]
+
+def verbose_schema(tables):
+    """Schema in the previous nested-dict format"""
+    return {
+        table["table_name"]: {
+            "description": table["table_description"],
+            "columns": [
+                {
+                    "name": col["column_name"],
+                    "data_type": col["data_type"],
+                    "is_nullable": col["is_nullable"] == "YES",
+                    "default": col["column_default"],
+                    "description": col["description"],
+                }
+                for col in table["columns"]
+            ],
+        }
+        for table in tables
+    }
+
+def sample_rows(n=50):
+    return [
+        {
+            "id": f"0d2425a9-0663-4795-b9cb-{i:012d}",
+            "first_name": "Alex",
+            "last_name": "Morgan",
+            "email": f"alex{i}@example.com",
+            "program_id": None,
+            "notes": "Prefers evening classes. " * 20,
+        }
+        for i in range(n)
+    ]
+
+def sample_messages(n=20):
+    return [
+        {
+            "sid": f"SM{i:032d}",
+            "from": "+15555550100",
+            "to": "+15555550199",
+            "body": "Reminder: your Krav Maga class starts at 6pm tonight. Reply STOP to opt out. " * 3,
+            "status": "delivered",
+            "date_sent": "2025-01-06 18:00:00+00:00",
+            "direction": "outbound-api",
+        }
+        for i in range(n)
+    ]
+
+def make_token_counter():
+    """Counts tokens with the Anthropic token counting API, or estimates them if no API key is set"""
+    if not os.getenv("ANTHROPIC_API_KEY"):
+        print("ANTHROPIC_API_KEY not set - token counts below are len/4 estimates\n")
+        return estimate_tokens
+
+    client = anthropic.Anthropic()
+    model = os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-latest")
+
+    def count(text):
+        return client.messages.count_tokens(model=model, messages=[{"role": "user", "content": text}]).input_tokens
+
+    # Subtract the fixed per-message overhead so only the tool result is counted
+    overhead = count(".") - 1
+    return lambda text: count(text) - overhead
+
+def kept_items(encoded, total):
+    """Describes how much of a result survived the token budget"""
+    if not encoded.startswith(("{", "[")):
+        return "cut" if "[truncated," in encoded else "all"
+    payload = json.loads(encoded)
+    if isinstance(payload, dict) and "rows" in payload:
+        return f"{len(payload['rows'])}/{total}"
+    if isinstance(payload, dict) and "items" in payload:
+        return f"{len(payload['items'])}/{total}"
+    return f"{total}/{total}"
+
+def report(count_tokens, name, verbose, compact_payload, total):
+    """Prints format savings (no budget) and the effect of the tool's token budget separately"""
+    before = count_tokens(verbose)
+    unbudgeted = count_tokens(encode_result(name, compact_payload, budget=UNLIMITED_BUDGET))
+    budgeted = encode_result(name, compact_payload)
+    saved = 100 * (before - unbudgeted) / before
+    print(
+        f"{name:<15} {before:>8} {unbudgeted:>8} {saved:>7.1f}% "
+        f"{TOOL_TOKEN_BUDGETS[name]:>8} {count_tokens(budgeted):>8} {kept_items(budgeted, total):>8}"
+    )
+
+def main():
+    """Compare token counts of verbose and compact tool results"""
+    count_tokens = make_token_counter()
+    print(f"{'tool':<15} {'before':>8} {'compact':>8} {'saved':>8} {'budget':>8} {'sent':>8} {'kept':>8}")
+
+    tables = sample_schema()
+    report(count_tokens, "get_schema", json.dumps(verbose_schema(tables)), schema_to_ddl(tables), len(tables))
+
+    rows = sample_rows()
+    report(
+        count_tokens,
+        "run_sql_query",
+        json.dumps({"rows": rows, "count": len(rows), "message": "Query successful"}),
+        compact_rows(rows),
+        len(rows),
+    )
+
+    messages = sample_messages()
+    report(count_tokens, "list_messages", json.dumps(messages), compact_records(messages), len(messages))
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,12 @@ from typing import Optional, Callable
 
 from phi.agent import Agent
 from phi.model.anthropic import Claude
-from phi.tools.sql import SQLTools
-from phi.tools.twilio import TwilioTools
+from .sql_tools import GuardedSQLTools
+from .twilio_tools import CompactTwilioTools
+from .tools import SEARCH_INSTRUCTIONS, get_schema, search_records
 
 from ..db.message_logger import MessageLogger
 from ..db.organization_service import OrganizationService
-from ..db.config import get_db_url
 
 # Configure logging with more detail
 logging.basicConfig(
@@ -24,13 +24,16 @@ class AgentFactory:
         pass
         
     def create_agent(self, model: Optional[str] = None) -> Agent:
-        """Create a new agent instance with SQL and Twilio tools"""
+        """Create a new agent instance with SQL, search and Twilio tools"""
         return Agent(
             model=Claude(id=model or os.getenv("ANTHROPIC_MODEL")),
             tools=[
-                SQLTools(db_url=get_db_url(use_connection_pooling=True)),
-                TwilioTools(),
+                GuardedSQLTools(),
+                CompactTwilioTools(),
+                get_schema,
+                search_records,
             ],
+            instructions=SEARCH_INSTRUCTIONS,
             show_tool_calls=True,
             read_chat_history=True,
             markdown=True
@@ -2,15 +2,17 @@ import os
 from typing import Optional, List
 from dataclasses import dataclass
 from dotenv import load_dotenv
+from sqlalchemy import text
 
 from phi.agent import Agent
 from phi.model.anthropic import Claude
-from phi.tools.sql import SQLTools
-from phi.tools.twilio import TwilioTools
 from phi.storage.agent.postgres import PgAgentStorage
+from .sql_tools import GuardedSQLTools
+from .twilio_tools import CompactTwilioTools
+from .tools import SEARCH_INSTRUCTIONS, get_schema, search_records
 
 from knowledge_base import knowledge_base
-from ..db.config import get_db_url
+from ..db.config import get_db_engine, get_db_url
 
 
 
@@ -46,12 +48,11 @@ class AgentConfig:
 
 def get_org_data(user_id: str) -> str:
     """Fetch organization data and format it for instructions"""
-    sql = SQLTools(db_url=get_db_url(use_connection_pooling=True))
-    query = """
+    query = text("""
     WITH user_org AS (
         SELECT organization_id 
         FROM profiles 
-        WHERE id = %(user_id)s
+        WHERE id = :user_id
     )
     SELECT 
         o.id as organization_id,
@@ -65,9 +66,10 @@ def get_org_data(user_id: str) -> str:
     LEFT JOIN locations l ON l.organization_id = o.id
     LEFT JOIN programs p ON p.location_id = l.id
     ORDER BY o.name, l.short_name, p.name;
-    """
+    """)
     try:
-        results = sql.query(query, parameters={"user_id": user_id})
+        with get_db_engine(use_connection_pooling=True).connect() as connection:
+            results = [dict(row._mapping) for row in connection.execute(query, {"user_id": user_id})]
         
         if not results:
             return "No organization data found for this user."
@@ -111,8 +113,10 @@ class AgentFactory:
     def create_tools(self) -> List:
         """Create and configure agent tools"""
         return [
-            SQLTools(db_url=get_db_url(use_connection_pooling=True)),
-            TwilioTools(),
+            GuardedSQLTools(),
+            CompactTwilioTools(),
+            get_schema,
+            search_records,
         ]
     
     def create_agent(self, run_id: Optional[str] = None, user_id: str = "0d2425a9-0663-4795-b9cb-52b1343a82de") -> Agent:
@@ -121,7 +125,7 @@ class AgentFactory:
         org_data = get_org_data(user_id)
         
         # Update instructions with org data
-        instructions = AGENT_INSTRUCTIONS + "\n\n" + org_data
+        instructions = AGENT_INSTRUCTIONS + "\n\n" + SEARCH_INSTRUCTIONS + "\n\n" + org_data
         
         agent = Agent(
             run_id=run_id,
@@ -0,0 +1,166 @@
+import json
+from typing import Dict, Any, List, Optional
+
+# Per-tool token budgets for results sent back to the model
+TOOL_TOKEN_BUDGETS: Dict[str, int] = {
+    "get_schema": 3000,
+    "run_sql_query": 2000,
+    "list_messages": 1500,
+    "search_records": 500,
+}
+DEFAULT_TOKEN_BUDGET = 2000
+
+# Long text values are cut to this many characters
+MAX_TEXT_LENGTH = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for a string (about 4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def truncate_text(value: Any, max_length: int = MAX_TEXT_LENGTH) -> Any:
+    """Shortens long strings, keeping the original length so the model knows text was cut."""
+    if isinstance(value, str) and len(value) > max_length:
+        return f"{value[:max_length]}…[{len(value)} chars]"
+    return value
+
+
+def _to_json(payload: Any) -> str:
+    return json.dumps(payload, separators=(",", ":"), default=str, ensure_ascii=False)
+
+
+def _truncate_values(payload: Any, max_length: int) -> Any:
+    """Truncates every string nested in a payload, leaving its structure intact."""
+    if isinstance(payload, dict):
+        return {key: _truncate_values(value, max_length) for key, value in payload.items()}
+    if isinstance(payload, list):
+        return [_truncate_values(value, max_length) for value in payload]
+    return truncate_text(payload, max_length)
+
+
+def compact_rows(rows: List[Dict[str, Any]], max_text_length: int = MAX_TEXT_LENGTH) -> Dict[str, Any]:
+    """
+    Converts a list of row dicts into a column header plus row arrays.
+
+    Args:
+        rows: Query result rows, one dict per row
+        max_text_length: Strings longer than this are truncated
+
+    Returns:
+        Dictionary with "columns", "rows" and "count" keys
+    """
+    columns: List[str] = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+
+    return {
+        "columns": columns,
+        "rows": [[truncate_text(row.get(col), max_text_length) for col in columns] for row in rows],
+        "count": len(rows),
+    }
+
+
+def compact_records(records: List[Dict[str, Any]], max_text_length: int = MAX_TEXT_LENGTH) -> List[Dict[str, Any]]:
+    """Drops null/empty fields and truncates long text in each record."""
+    return [
+        {
+            key: truncate_text(value, max_text_length)
+            for key, value in record.items()
+            if value is not None and value != ""
+        }
+        for record in records
+    ]
+
+
+def schema_to_ddl(tables: List[Dict[str, Any]]) -> str:
+    """
+    Renders schema rows in a terse DDL-like form, one line per column.
+
+    Args:
+        tables: Rows with table_name, table_description and columns, where each column has
+            column_name, data_type, is_nullable, column_default and description
+
+    Returns:
+        Schema text, e.g. "members -- Gym members\\n  id uuid NOT NULL DEFAULT gen_random_uuid()"
+    """
+    lines: List[str] = []
+    for table in tables:
+        header = table["table_name"]
+        if table.get("table_description"):
+            header += f" -- {truncate_text(table['table_description'])}"
+        lines.append(header)
+
+        for col in table.get("columns") or []:
+            line = f"  {col['column_name']} {col['data_type']}"
+            if col.get("is_nullable") == "NO":
+                line += " NOT NULL"
+            if col.get("column_default") is not None:
+                line += f" DEFAULT {truncate_text(col['column_default'], 60)}"
+            if col.get("description"):
+                line += f" -- {truncate_text(col['description'], 120)}"
+            lines.append(line)
+
+    return "\n".join(lines)
+
+
+def encode_result(tool_name: str, payload: Any, budget: Optional[int] = None) -> str:
+    """
+    Serializes a tool result compactly and trims it to the tool's token budget.
+
+    Row-shaped payloads (with a "rows" list), dictionaries of row-shaped groups and plain
+    lists are trimmed from the end and marked with "truncated"/"total" so the model can
+    narrow its query. Grouped payloads keep the same number of rows per group. Other payloads
+    have their string values shortened, so the result is always valid JSON. Plain strings are cut.
+
+    Args:
+        tool_name: Name of the tool, used to look up its budget
+        payload: A string, list, or dictionary to encode
+        budget: Optional token budget overriding TOOL_TOKEN_BUDGETS
+
+    Returns:
+        Encoded result string within the token budget
+    """
+    budget = budget or TOOL_TOKEN_BUDGETS.get(tool_name, DEFAULT_TOKEN_BUDGET)
+    max_chars = budget * 4
+
+    if isinstance(payload, str):
+        if len(payload) <= max_chars:
+            return payload
+        return f"{payload[:max_chars]}\n…[truncated, {len(payload)} chars total]"
+
+    encoded = _to_json(payload)
+    if len(encoded) <= max_chars:
+        return encoded
+
+    if isinstance(payload, list):
+        size, trim = len(payload), lambda n: {"items": payload[:n], "truncated": True, "total": len(payload)}
+    elif isinstance(payload, dict) and isinstance(payload.get("rows"), list):
+        size, trim = len(payload["rows"]), lambda n: {**payload, "rows": payload["rows"][:n], "truncated": True}
+    elif isinstance(payload, dict) and payload and all(
+        isinstance(group, dict) and isinstance(group.get("rows"), list) for group in payload.values()
+    ):
+        size = max(len(group["rows"]) for group in payload.values())
+        trim = lambda n: {
+            key: {**group, "rows": group["rows"][:n], "truncated": True} if len(group["rows"]) > n else group
+            for key, group in payload.items()
+        }
+    else:
+        for max_length in (MAX_TEXT_LENGTH, 80, 20):
+            encoded = _to_json(_truncate_values(payload, max_length))
+            if len(encoded) <= max_chars:
+                return encoded
+        # Escaping can double the length of the cut text, so keep it under half the budget
+        return _to_json({"truncated": True, "text": encoded[:max(max_chars // 2 - 32, 0)]})
+
+    # Binary search for the largest prefix that fits the budget
+    low, high = 0, size
+    while low < high:
+        mid = (low + high + 1) // 2
+        if len(_to_json(trim(mid))) <= max_chars:
+            low = mid
+        else:
+            high = mid - 1
+    return _to_json(trim(low))
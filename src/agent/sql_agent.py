@@ -3,12 +3,12 @@ from phi.model.anthropic import Claude
 from phi.storage.assistant.postgres import PgAssistantStorage
 from phi.tools.sql import SQLTools
 import os
-from .tools import run_sql_query
+from .tools import SEARCH_INSTRUCTIONS, get_schema, run_sql_query, search_records
 from ..db.config import get_db_url
 
 sql_agent = Agent(
     model=Claude(id=os.getenv("ANTHROPIC_MODEL")),
-    tools=[run_sql_query],
+    tools=[get_schema, run_sql_query, search_records],
     storage=PgAssistantStorage(
         table_name="martial_arts_assistant",
         db_url=get_db_url(use_connection_pooling=True)
@@ -20,7 +20,8 @@ sql_agent = Agent(
     monitoring=True,
     instructions="""You are a SQL assistant that helps users query a PostgreSQL database.
 
-When searching text fields, use ILIKE for case-insensitive pattern matching.
-Example: WHERE short_name ILIKE '%search_term%'
-"""
+Queries are checked before they run: destructive statements are rejected, large reads get a LIMIT,
+and expensive queries are refused. If a query is rejected, narrow it rather than retrying it as is.
+
+""" + SEARCH_INSTRUCTIONS + "\n"
 ) 
\ No newline at end of file
@@ -0,0 +1,372 @@
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from ..db.config import get_db_engine
+
+logger = logging.getLogger(__name__)
+
+# Statements the agent is never allowed to run
+BLOCKED_KEYWORDS = {
+    "drop", "delete", "truncate", "alter", "grant", "revoke", "create",
+    "copy", "vacuum", "reindex", "cluster",
+}
+ALLOWED_KEYWORDS = {"select", "with", "insert", "update", "values", "table", "explain", "show"}
+# Functions that act on the server or other sessions, or change settings such as the timeout
+BLOCKED_FUNCTIONS = {
+    "pg_terminate_backend", "pg_cancel_backend", "pg_reload_conf", "pg_rotate_logfile",
+    "pg_sleep", "pg_sleep_for", "pg_sleep_until", "set_config", "setval",
+    "pg_read_file", "pg_read_binary_file", "pg_ls_dir", "pg_stat_file", "lo_import", "lo_export",
+    "dblink", "dblink_exec", "dblink_connect", "dblink_send_query",
+}
+
+_WORD_RE = re.compile(r"[a-z_][a-z0-9_]*")
+_TOKEN_RE = re.compile(r"[a-z_][a-z0-9_]*|[()]")
+_WHITESPACE_RE = re.compile(r"\s+")
+_BIND_COLON_RE = re.compile(r"(?<!:):(?!:)")
+_DOLLAR_TAG_RE = re.compile(r"\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$")
+
+# Segment kinds produced by _scan
+CODE, STRING, IDENTIFIER = "code", "string", "identifier"
+
+
+class SqlGuardError(ValueError):
+    """Raised when a statement is rejected before execution."""
+
+
+def _scan(query: str) -> List[List[Tuple[str, str]]]:
+    """
+    Splits a query into statements of (kind, text) segments.
+
+    String literals ('...' with '' escapes, E'...' with backslash escapes, $tag$...$tag$ bodies)
+    and quoted identifiers are read whole before comments or semicolons are considered.
+    Comments become a single space in the surrounding code.
+
+    Raises:
+        SqlGuardError: If a literal, identifier or comment is not terminated
+    """
+    statements: List[List[Tuple[str, str]]] = []
+    segments: List[Tuple[str, str]] = []
+    code: List[str] = []
+    i, n = 0, len(query)
+
+    def flush_code():
+        if code:
+            segments.append((CODE, "".join(code)))
+            code.clear()
+
+    while i < n:
+        char = query[i]
+        prev = query[i - 1] if i else ""
+
+        if char == "'":
+            backslash_escapes = prev in "eE" and (i < 2 or not (query[i - 2].isalnum() or query[i - 2] == "_"))
+            j = i + 1
+            while True:
+                if j >= n:
+                    raise SqlGuardError("Unterminated string literal")
+                if backslash_escapes and query[j] == "\\":
+                    j += 2
+                elif query[j] == "'" and j + 1 < n and query[j + 1] == "'":
+                    j += 2
+                elif query[j] == "'":
+                    break
+                else:
+                    j += 1
+            flush_code()
+            segments.append((STRING, query[i:j + 1]))
+            i = j + 1
+        elif char == '"':
+            j = i + 1
+            while True:
+                j = query.find('"', j)
+                if j < 0:
+                    raise SqlGuardError("Unterminated quoted identifier")
+                if j + 1 < n and query[j + 1] == '"':
+                    j += 2
+                    continue
+                break
+            flush_code()
+            segments.append((IDENTIFIER, query[i:j + 1]))
+            i = j + 1
+        elif char == "$" and not (prev.isalnum() or prev in "_$") and _DOLLAR_TAG_RE.match(query, i):
+            tag = _DOLLAR_TAG_RE.match(query, i).group(0)
+            j = query.find(tag, i + len(tag))
+            if j < 0:
+                raise SqlGuardError("Unterminated dollar-quoted string")
+            flush_code()
+            segments.append((STRING, query[i:j + len(tag)]))
+            i = j + len(tag)
+        elif query.startswith("--", i):
+            j = query.find("\n", i)
+            code.append(" ")
+            i = n if j < 0 else j
+        elif query.startswith("/*", i):
+            # Postgres block comments nest
+            depth, j = 1, i + 2
+            while depth:
+                if j >= n:
+                    raise SqlGuardError("Unterminated block comment")
+                if query.startswith("/*", j):
+                    depth, j = depth + 1, j + 2
+                elif query.startswith("*/", j):
+                    depth, j = depth - 1, j + 2
+                else:
+                    j += 1
+            code.append(" ")
+            i = j
+        elif char == ";":
+            flush_code()
+            statements.append(segments)
+            segments = []
+            i += 1
+        else:
+            code.append(char)
+            i += 1
+
+    flush_code()
+    statements.append(segments)
+    return [s for s in statements if "".join(text for _, text in s).strip()]
+
+
+def _join(segments: List[Tuple[str, str]]) -> str:
+    return "".join(text for _, text in segments).strip()
+
+
+def _masked(segments: List[Tuple[str, str]]) -> str:
+    """Lowercased code with literals and quoted identifiers blanked, so keywords inside them are ignored."""
+    blanks = {STRING: "''", IDENTIFIER: '""'}
+    return "".join(text.lower() if kind == CODE else blanks[kind] for kind, text in segments)
+
+
+def _words(statement: str) -> List[str]:
+    return _WORD_RE.findall(_masked(_scan(statement)[0])) if statement.strip() else []
+
+
+def _sql(statement: str):
+    """Wraps raw SQL in text(), escaping lone colons so they aren't read as bind parameters."""
+    return text(_BIND_COLON_RE.sub(r"\\:", statement))
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a query for plan caching: comments removed and whitespace collapsed outside
+    literals. Literals are kept, since LIMIT values and filter constants change the plan.
+    """
+    parts = []
+    for statement in _scan(query):
+        for kind, text in statement:
+            parts.append(_WHITESPACE_RE.sub(" ", text.lower()) if kind == CODE else text)
+    return "".join(parts).strip()
+
+
+def _unfiltered_update(tokens: List[str]) -> bool:
+    """
+    True if any UPDATE statement in the token list has no WHERE at its own paren depth.
+
+    ON CONFLICT ... DO UPDATE and row locks (FOR UPDATE, FOR NO KEY UPDATE) are not UPDATE statements.
+    """
+    depths, depth = [], 0
+    for token in tokens:
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        depths.append(depth)
+
+    for position, token in enumerate(tokens):
+        if token != "update" or (position and tokens[position - 1] in ("do", "for", "key")):
+            continue
+        update_depth = depths[position]
+        for later in range(position + 1, len(tokens)):
+            if depths[later] < update_depth:
+                return True
+            if tokens[later] == "where" and depths[later] == update_depth:
+                break
+        else:
+            return True
+    return False
+
+
+def split_statements(query: str) -> List[str]:
+    """Splits a query string into statements on semicolons outside literals, identifiers and comments."""
+    return [_join(statement) for statement in _scan(query)]
+
+
+class SqlGuard:
+    """
+    Checks model-written SQL before it runs: rejects destructive statements, estimates
+    cost with EXPLAIN, adds a LIMIT to large reads, and executes with a statement timeout.
+    """
+
+    def __init__(
+        self,
+        db_engine,
+        max_cost: float = 100000.0,
+        max_rows: int = 1000,
+        default_limit: int = 100,
+        statement_timeout_ms: int = 5000,
+        plan_cache_size: int = 256,
+        plan_cache_ttl_seconds: int = 300,
+    ):
+        self.db_engine = db_engine
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.default_limit = default_limit
+        self.statement_timeout_ms = statement_timeout_ms
+        self.plan_cache_size = plan_cache_size
+        self.plan_cache_ttl_seconds = plan_cache_ttl_seconds
+        self._plan_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "checked": 0,
+            "rejected": 0,
+            "rewritten": 0,
+            "timed_out": 0,
+            "plan_cache_hits": 0,
+            "plan_cache_misses": 0,
+        }
+
+    def validate(self, query: str) -> str:
+        """
+        Parses a query and rejects anything other than a single non-destructive statement.
+
+        Args:
+            query: SQL written by the model
+
+        Returns:
+            The statement without a trailing semicolon
+
+        Raises:
+            SqlGuardError: If the query is empty, has several statements, or is destructive
+        """
+        statements = _scan(query)
+        if not statements:
+            raise SqlGuardError("Empty query")
+        if len(statements) > 1:
+            raise SqlGuardError("Only one statement can be run at a time")
+
+        tokens = _TOKEN_RE.findall(_masked(statements[0]))
+        words = [token for token in tokens if token not in "()"]
+        if not words or words[0] not in ALLOWED_KEYWORDS:
+            raise SqlGuardError(f"Statement type not allowed: {words[0] if words else _join(statements[0])}")
+
+        blocked = BLOCKED_KEYWORDS.intersection(words)
+        if blocked:
+            raise SqlGuardError(f"Destructive statements are not allowed: {', '.join(sorted(blocked)).upper()}")
+        functions = BLOCKED_FUNCTIONS.intersection(words)
+        if functions:
+            raise SqlGuardError(f"Administrative functions are not allowed: {', '.join(sorted(functions))}")
+        if any(word == "into" and (position == 0 or words[position - 1] != "insert") for position, word in enumerate(words)):
+            raise SqlGuardError("SELECT ... INTO creates a table and is not allowed")
+        if _unfiltered_update(tokens):
+            raise SqlGuardError("UPDATE without a WHERE clause is not allowed")
+        if words[0] == "explain" and {"analyze", "analyse"} & set(words):
+            raise SqlGuardError("EXPLAIN ANALYZE executes the statement and is not allowed; use EXPLAIN")
+
+        return _join(statements[0])
+
+    def explain(self, connection, statement: str) -> Dict[str, Any]:
+        """Returns the planner's estimated cost and rows, cached per normalized query for plan_cache_ttl_seconds."""
+        key = normalize_query(statement)
+        cached = self._plan_cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.plan_cache_ttl_seconds:
+            self.stats["plan_cache_hits"] += 1
+            self._plan_cache.move_to_end(key)
+            return cached[1]
+
+        self.stats["plan_cache_misses"] += 1
+        raw_plan = connection.execute(_sql(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+        if isinstance(raw_plan, str):
+            raw_plan = json.loads(raw_plan)
+        top = raw_plan[0]["Plan"]
+        plan = {"cost": float(top["Total Cost"]), "rows": int(top["Plan Rows"])}
+
+        self._plan_cache[key] = (time.monotonic(), plan)
+        self._plan_cache.move_to_end(key)
+        if len(self._plan_cache) > self.plan_cache_size:
+            self._plan_cache.popitem(last=False)
+        return plan
+
+    def _is_limitable(self, statement: str) -> bool:
+        return not set(_words(statement)) & {"insert", "update", "limit", "fetch"}
+
+    def check(self, connection, statement: str) -> Tuple[str, Optional[int]]:
+        """
+        Refuses statements the planner estimates as too expensive and adds a LIMIT to
+        large reads that don't have one. EXPLAIN (without ANALYZE) and SHOW don't execute
+        anything and are passed through.
+
+        Returns:
+            The statement to execute, possibly rewritten, and the LIMIT added (or None)
+
+        Raises:
+            SqlGuardError: If the estimated cost is over max_cost and a LIMIT can't help
+        """
+        if _words(statement)[0] in ("explain", "show"):
+            return statement, None
+
+        limited_to = None
+        plan = self.explain(connection, statement)
+        if plan["rows"] > self.max_rows and self._is_limitable(statement):
+            statement = f"{statement}\nLIMIT {self.default_limit}"
+            limited_to = self.default_limit
+            self.stats["rewritten"] += 1
+            logger.info(f"Added LIMIT {self.default_limit} to query estimated at {plan['rows']} rows")
+            plan = self.explain(connection, statement)
+
+        if plan["cost"] > self.max_cost:
+            raise SqlGuardError(
+                f"Query is too expensive (estimated cost {plan['cost']:.0f}, limit {self.max_cost:.0f}). "
+                "Filter on indexed columns or narrow the query."
+            )
+        return statement, limited_to
+
+    def run(self, query: str) -> Dict[str, Any]:
+        """
+        Validates, cost-checks and executes a query with a statement timeout.
+
+        Args:
+            query: SQL written by the model
+
+        Returns:
+            Dictionary with "rows" (result rows as dictionaries, empty for statements that
+            return no rows) and "limited_to" (the LIMIT the guard added, or None)
+
+        Raises:
+            SqlGuardError: If the query is rejected
+        """
+        self.stats["checked"] += 1
+        try:
+            statement = self.validate(query)
+            with self.db_engine.begin() as connection:
+                connection.execute(text(f"SET LOCAL statement_timeout = {int(self.statement_timeout_ms)}"))
+                statement, limited_to = self.check(connection, statement)
+                result = connection.execute(_sql(statement))
+                rows = [dict(row._mapping) for row in result] if result.returns_rows else []
+                return {"rows": rows, "limited_to": limited_to}
+        except SqlGuardError as e:
+            self.stats["rejected"] += 1
+            logger.warning(f"Rejected query: {e} | stats: {self.stats}")
+            raise
+        except OperationalError as e:
+            if "statement timeout" in str(e):
+                self.stats["timed_out"] += 1
+                logger.warning(f"Query timed out after {self.statement_timeout_ms}ms | stats: {self.stats}")
+            raise
+
+
+_guard: Optional[SqlGuard] = None
+
+
+def get_sql_guard() -> SqlGuard:
+    """Returns the shared guard so the plan cache and stats persist across tool calls."""
+    global _guard
+    if _guard is None:
+        _guard = SqlGuard(get_db_engine(use_connection_pooling=True))
+    return _guard
@@ -0,0 +1,28 @@
+from typing import Optional
+
+from phi.tools.sql import SQLTools
+
+from .sql_guard import get_sql_guard
+from .tools import run_guarded_query
+
+class GuardedSQLTools(SQLTools):
+    """SQLTools whose run_sql_query goes through the shared SqlGuard."""
+
+    def __init__(self, **kwargs):
+        # list_tables and describe_table share the guard's engine instead of building their own
+        kwargs.setdefault("db_engine", get_sql_guard().db_engine)
+        super().__init__(**kwargs)
+
+    def run_sql_query(self, query: str, limit: Optional[int] = 10) -> str:
+        """Use this function to run a SQL query and return the result.
+
+        Destructive statements are rejected, large reads get a LIMIT and expensive queries
+        are refused. If the result has "limited_to", it is not the complete result.
+
+        Args:
+            query (str): The query to run.
+            limit (int, optional): The number of rows to return. Defaults to 10. Use `None` to show all results.
+        Returns:
+            str: Result of the SQL query.
+        """
+        return run_guarded_query(query, limit=limit)
@@ -1,17 +1,19 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
 import os
-from phi.tools.sql import SQLTools
 from phi.tools import tool
-from ..db.config import get_db_url
+from sqlalchemy import text
+from ..db.config import get_db_engine
+from ..db.search_service import SearchService
+from .result_format import compact_rows, encode_result, schema_to_ddl
+from .sql_guard import SqlGuardError, get_sql_guard
 
 @tool(name="get_schema", description="Fetches the database schema for specified tables or all tables if none specified.")
-def get_schema(tables: str = None) -> Dict[str, Any]:
-    """Fetches database schema information.
+def get_schema(tables: str = None) -> str:
+    """Fetches database schema information in a terse DDL-like form.
     Args:
         tables: Optional comma-separated list of table names. If None, fetches all tables.
     """
-    sql_tools = SQLTools(db_url=get_db_url(use_connection_pooling=True))
     try:
         # Query to get table schema with descriptions
         query = """
@@ -54,58 +56,90 @@ def get_schema(tables: str = None) -> Dict[str, Any]:
         parameters = {}
         if tables:
             table_list = [t.strip() for t in tables.split(',')]
-            query += " WHERE ci.table_name = ANY(%(table_list)s)"
+            query += " WHERE ci.table_name = ANY(:table_list)"
             parameters["table_list"] = table_list
 
         query += " ORDER BY table_name"
 
-        result = sql_tools.run_sql_query(query, parameters=parameters)
-        print("DEBUG - Raw Query Result:")
-        print(json.dumps(result, indent=2))
+        with get_db_engine(use_connection_pooling=True).connect() as connection:
+            rows = [dict(row._mapping) for row in connection.execute(text(query), parameters)]
 
-        # Format the schema info into a structured dictionary
-        schema_info: Dict[str, Any] = {}
-        for table in result.get("rows", []):
-            table_name = table["table_name"]
-            schema_info[table_name] = {
-                "description": table["table_description"],
-                "columns": [
-                    {
-                        "name": col["column_name"],
-                        "data_type": col["data_type"],
-                        "is_nullable": col["is_nullable"] == "YES",
-                        "default": col["column_default"],
-                        "description": col["description"],
-                    }
-                    for col in table["columns"]
-                ],
-            }
-
-        print("DEBUG - Formatted Schema Info:")
-        print(schema_info)
-        return schema_info
+        # Format the schema info as one line per column to keep the context small
+        return encode_result("get_schema", schema_to_ddl(rows))
 
     except Exception as e:
-        print("DEBUG - Error in get_schema:")
-        print(str(e))
-        return {
+        return json.dumps({
             "error": str(e),
             "message": "Failed to fetch schema",
-        }
+        })
 
-@tool(name="run_sql_query", description="Executes a raw SQL query on the martial_arts_crm database and returns JSON.")
-def run_sql_query(query: str) -> str:
-    """Executes SQL queries using Supabase Postgres."""
-    sql_tools = SQLTools(db_url=get_db_url(use_connection_pooling=True))
+def run_guarded_query(query: str, limit: Optional[int] = None) -> str:
+    """Runs model-written SQL through the shared SqlGuard and encodes the result.
+    Args:
+        query: SQL written by the model.
+        limit: Optional maximum number of rows to return.
+    Returns:
+        Compact JSON result. "limited_to" is set when the guard or the limit cut the rows,
+        so the count is not mistaken for a complete answer.
+    """
     try:
-        result = sql_tools.run_sql_query(query)
+        result = get_sql_guard().run(query)
+        rows, limited_to = result["rows"], result["limited_to"]
+        if limit and len(rows) > limit:
+            rows, limited_to = rows[:limit], limit
+
+        payload = compact_rows(rows)
+        if limited_to:
+            payload["limited_to"] = limited_to
+        return encode_result("run_sql_query", payload)
+    except SqlGuardError as e:
         return json.dumps({
-            "rows": result.get("rows", []),
-            "count": len(result.get("rows", [])),
-            "message": "Query successful"
+            "error": str(e),
+            "message": "Query rejected"
         })
     except Exception as e:
         return json.dumps({
             "error": str(e),
             "message": "Query failed"
-        }) 
\ No newline at end of file
+        })
+
+@tool(name="run_sql_query", description="Executes a raw SQL query on the martial_arts_crm database and returns JSON.")
+def run_sql_query(query: str) -> str:
+    """Executes SQL queries using Supabase Postgres after a safety and cost check."""
+    return run_guarded_query(query)
+
+_search_service = None
+
+# Upper bound on search_records matches per kind, whatever limit the model asks for
+MAX_SEARCH_LIMIT = 20
+
+SEARCH_INSTRUCTIONS = """To find a location, program or member by name, use the search_records tool and then
+query by the returned IDs. Avoid ILIKE '%search_term%' scans on large tables."""
+
+@tool(name="search_records", description="Fuzzy search for locations, programs and members of the organization by name (or member email). Returns ranked matches with IDs, grouped by kind.")
+def search_records(term: str, kind: str = None, limit: int = 5) -> str:
+    """Finds records by approximate name using trigram indexes instead of ILIKE scans.
+    Args:
+        term: Name (or part of a name) to search for.
+        kind: Optional "location", "program" or "member". If None, searches all three.
+        limit: Maximum number of matches to return per kind (at most 20).
+    """
+    global _search_service
+    try:
+        if _search_service is None:
+            _search_service = SearchService(get_db_engine(use_connection_pooling=True))
+        organization_id = os.getenv("ORGANIZATION_ID")
+        if not organization_id:
+            raise ValueError("ORGANIZATION_ID environment variable is not set")
+
+        limit = max(1, min(int(limit), MAX_SEARCH_LIMIT))
+        results = _search_service.search(term, organization_id, kind=kind, limit=limit)
+        return encode_result(
+            "search_records",
+            {result_kind: compact_rows(matches) for result_kind, matches in results.items()},
+        )
+    except Exception as e:
+        return json.dumps({
+            "error": str(e),
+            "message": "Search failed"
+        })
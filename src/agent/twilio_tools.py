@@ -0,0 +1,37 @@
+from phi.tools.twilio import TwilioTools
+from phi.utils.log import logger
+from twilio.base.exceptions import TwilioRestException
+
+from .result_format import compact_records, encode_result
+
+class CompactTwilioTools(TwilioTools):
+    """Twilio toolkit that returns message lists in the compact tool-result encoding."""
+
+    def list_messages(self, limit: int = 20) -> str:
+        """
+        List recent SMS messages.
+
+        Args:
+            limit: Maximum number of messages to return
+
+        Returns:
+            str: JSON list of message details, with empty fields dropped and long bodies truncated
+        """
+        try:
+            records = [
+                {
+                    "sid": message.sid,
+                    "to": message.to,
+                    "from": message.from_,
+                    "body": message.body,
+                    "status": message.status,
+                    "date_sent": str(message.date_sent) if message.date_sent else None,
+                    "direction": message.direction,
+                }
+                for message in self.client.messages.list(limit=limit)
+            ]
+            logger.info(f"Retrieved {len(records)} messages")
+            return encode_result("list_messages", compact_records(records))
+        except TwilioRestException as e:
+            logger.error(f"Failed to list messages: {e}")
+            return encode_result("list_messages", [{"error": str(e)}])
@@ -0,0 +1,52 @@
+import logging
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Trigram indexes backing fuzzy name search (ILIKE '%term%', similarity and word_similarity)
+SEARCH_INDEXES = {
+    "idx_locations_short_name_trgm": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_locations_short_name_trgm ON locations USING gin (short_name gin_trgm_ops)",
+    "idx_programs_name_trgm": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_programs_name_trgm ON programs USING gin (name gin_trgm_ops)",
+    "idx_members_full_name_trgm": (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_members_full_name_trgm ON members "
+        "USING gin ((coalesce(first_name, '') || ' ' || coalesce(last_name, '')) gin_trgm_ops)"
+    ),
+    "idx_members_email_trgm": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_members_email_trgm ON members USING gin (email gin_trgm_ops)",
+    "idx_members_organization_id": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_members_organization_id ON members (organization_id)",
+}
+
+def create_search_indexes(db_engine) -> None:
+    """
+    Enables pg_trgm and creates the indexes used by the search tool. Safe to run repeatedly.
+
+    Indexes are built CONCURRENTLY so writes to the tables aren't blocked while they build,
+    which requires running each statement outside a transaction. An invalid index left by
+    an interrupted build is dropped and rebuilt.
+
+    Args:
+        db_engine: SQLAlchemy engine connected directly to the database (not the pooler)
+    """
+    with db_engine.begin() as connection:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    with db_engine.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        for name, statement in SEARCH_INDEXES.items():
+            is_valid = connection.execute(
+                text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+                {"name": name},
+            ).scalar()
+            if is_valid is False:
+                logger.info(f"Dropping invalid index {name}")
+                connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+            logger.info(f"Creating index {name}")
+            connection.execute(text(statement))
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from .config import get_db_engine
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    create_search_indexes(get_db_engine(use_connection_pooling=False))
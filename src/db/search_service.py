@@ -0,0 +1,187 @@
+import re
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Same expression as idx_members_full_name_trgm so the index is used
+MEMBER_NAME_SQL = "(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))"
+
+def trigrams(value: str) -> Set[str]:
+    """Splits text into trigrams the way pg_trgm does: lowercased words padded with spaces."""
+    grams: Set[str] = set()
+    for word in _WORD_RE.findall(value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def escape_like(term: str) -> str:
+    """Escapes LIKE/ILIKE wildcards so the term only matches literally."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class FuzzyIndex:
+    """In-memory trigram index for small reference tables such as locations and programs."""
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        """
+        Args:
+            entries: Records with at least "id", "name" and "type" keys
+        """
+        self.entries = entries
+        self._grams: List[Tuple[Set[str], List[Set[str]]]] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+        for position, entry in enumerate(entries):
+            name = entry["name"] or ""
+            name_grams = trigrams(name)
+            self._grams.append((name_grams, [trigrams(word) for word in _WORD_RE.findall(name.lower())]))
+            for gram in name_grams:
+                self._postings[gram].append(position)
+
+    @staticmethod
+    def _similarity(a: Set[str], b: Set[str]) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def search(self, term: str, limit: int = 5, min_score: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Ranks entries by trigram similarity to the term, against the whole name or any word in it.
+
+        Args:
+            term: Text to search for
+            limit: Maximum number of matches to return
+            min_score: Minimum similarity (0-1) for a match
+
+        Returns:
+            Matching entries with a "score" key, best first
+        """
+        term_grams = trigrams(term)
+        term_lower = term.lower().strip()
+        candidates = {position for gram in term_grams for position in self._postings.get(gram, [])}
+
+        matches = []
+        for position in candidates:
+            name_grams, word_grams = self._grams[position]
+            score = max([self._similarity(term_grams, name_grams)] + [self._similarity(term_grams, w) for w in word_grams])
+            if term_lower and term_lower in (self.entries[position]["name"] or "").lower():
+                score = max(score, 0.9)
+            if score >= min_score:
+                matches.append({**self.entries[position], "score": round(score, 3)})
+
+        matches.sort(key=lambda match: match["score"], reverse=True)
+        return matches[:limit]
+
+class SearchService:
+    def __init__(self, db_engine, reference_ttl_seconds: int = 300):
+        self.db_engine = db_engine
+        self.reference_ttl_seconds = reference_ttl_seconds
+        self._reference_indexes: Dict[str, Tuple[float, FuzzyIndex]] = {}
+
+    def get_reference_index(self, organization_id: str) -> FuzzyIndex:
+        """
+        Returns the fuzzy index of an organization's locations and programs, reloading it
+        from the database once it is older than reference_ttl_seconds.
+
+        Args:
+            organization_id: The UUID of the organization.
+        """
+        cached = self._reference_indexes.get(organization_id)
+        if cached and time.monotonic() - cached[0] < self.reference_ttl_seconds:
+            return cached[1]
+
+        with self.db_engine.connect() as connection:
+            locations = connection.execute(
+                text("SELECT id, short_name FROM locations WHERE organization_id = :org_id"),
+                {"org_id": organization_id},
+            ).fetchall()
+            programs = connection.execute(
+                text(
+                    "SELECT p.id, p.name, l.short_name AS location_name FROM programs p "
+                    "JOIN locations l ON l.id = p.location_id WHERE l.organization_id = :org_id"
+                ),
+                {"org_id": organization_id},
+            ).fetchall()
+
+        entries = [{"type": "location", "id": str(row.id), "name": row.short_name} for row in locations]
+        entries += [
+            {"type": "program", "id": str(row.id), "name": row.name, "location": row.location_name}
+            for row in programs
+        ]
+        index = FuzzyIndex(entries)
+        self._reference_indexes[organization_id] = (time.monotonic(), index)
+        return index
+
+    def search_members(self, term: str, organization_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Finds members by name or email using the pg_trgm indexes.
+
+        Args:
+            term: Name or email fragment to search for
+            organization_id: The UUID of the organization.
+            limit: Maximum number of matches to return
+
+        Returns:
+            Matching members with a "score" key, best first
+        """
+        query = text(f"""
+            SELECT
+                id,
+                {MEMBER_NAME_SQL} AS name,
+                email,
+                greatest(word_similarity(:term, {MEMBER_NAME_SQL}), word_similarity(:term, coalesce(email, ''))) AS score
+            FROM members
+            WHERE organization_id = :org_id
+              AND (:term <% {MEMBER_NAME_SQL} OR email ILIKE :pattern)
+            ORDER BY score DESC
+            LIMIT :limit
+        """)
+        params = {"term": term, "pattern": f"%{escape_like(term)}%", "org_id": organization_id, "limit": limit}
+
+        with self.db_engine.connect() as connection:
+            rows = connection.execute(query, params).fetchall()
+
+        return [
+            {"type": "member", "id": str(row.id), "name": row.name.strip(), "email": row.email, "score": round(float(row.score), 3)}
+            for row in rows
+        ]
+
+    def search(self, term: str, organization_id: str, kind: Optional[str] = None, limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Searches locations, programs and members of an organization by fuzzy name match.
+
+        Locations and programs are scored in memory and members by Postgres word_similarity,
+        so results are grouped by kind rather than ranked against each other.
+
+        Args:
+            term: Text to search for
+            organization_id: The UUID of the organization.
+            kind: Optional "location", "program" or "member" to restrict the search
+            limit: Maximum number of matches to return per kind
+
+        Returns:
+            Dictionary mapping each searched kind to its matches, best first
+        """
+        if not organization_id:
+            raise ValueError("organization_id is required")
+        if kind not in (None, "location", "program", "member"):
+            raise ValueError(f"Invalid kind: {kind}")
+
+        kinds = [kind] if kind else ["location", "program", "member"]
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        if "location" in kinds or "program" in kinds:
+            index = self.get_reference_index(organization_id)
+            matches = index.search(term, limit=len(index.entries))
+            for reference_kind in ("location", "program"):
+                if reference_kind in kinds:
+                    results[reference_kind] = [m for m in matches if m["type"] == reference_kind][:limit]
+        if "member" in kinds:
+            results["member"] = self.search_members(term, organization_id, limit=limit)
+
+        return {
+            result_kind: [{key: value for key, value in match.items() if key != "type"} for match in matches]
+            for result_kind, matches in results.items()
+        }
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from src.agent.result_format import (
+    compact_records,
+    compact_rows,
+    encode_result,
+    estimate_tokens,
+    schema_to_ddl,
+    truncate_text,
+)
+
+
+def test_truncate_text_keeps_original_length_marker():
+    assert truncate_text("x" * 250, 200) == "x" * 200 + "…[250 chars]"
+    assert truncate_text("short", 200) == "short"
+    assert truncate_text(42, 1) == 42
+
+
+def test_compact_rows_uses_column_header_and_row_arrays():
+    result = compact_rows([{"id": 1, "name": "Kim"}, {"id": 2, "email": "a@b.c"}])
+    assert result == {
+        "columns": ["id", "name", "email"],
+        "rows": [[1, "Kim", None], [2, None, "a@b.c"]],
+        "count": 2,
+    }
+
+
+def test_compact_rows_truncates_long_text():
+    result = compact_rows([{"notes": "n" * 500}], max_text_length=10)
+    assert result["rows"][0][0] == "n" * 10 + "…[500 chars]"
+
+
+def test_compact_records_drops_empty_fields_but_keeps_real_values():
+    records = compact_records([{"sid": "SM1", "body": "None", "date_sent": None, "to": ""}])
+    assert records == [{"sid": "SM1", "body": "None"}]
+
+
+def test_schema_to_ddl():
+    tables = [
+        {
+            "table_name": "members",
+            "table_description": "Gym members",
+            "columns": [
+                {"column_name": "id", "data_type": "uuid", "is_nullable": "NO", "column_default": "gen_random_uuid()", "description": None},
+                {"column_name": "email", "data_type": "text", "is_nullable": "YES", "column_default": None, "description": "Login email"},
+            ],
+        }
+    ]
+    assert schema_to_ddl(tables) == (
+        "members -- Gym members\n"
+        "  id uuid NOT NULL DEFAULT gen_random_uuid()\n"
+        "  email text -- Login email"
+    )
+
+
+def test_encode_result_returns_small_payloads_unchanged():
+    payload = {"columns": ["id"], "rows": [[1]], "count": 1}
+    assert json.loads(encode_result("run_sql_query", payload)) == payload
+
+
+def test_encode_result_cuts_long_strings():
+    encoded = encode_result("get_schema", "s" * 1000, budget=50)
+    assert encoded.startswith("s" * 200)
+    assert encoded.endswith("…[truncated, 1000 chars total]")
+
+
+def test_encode_result_trims_rows_to_budget():
+    payload = compact_rows([{"id": i, "notes": "n" * 100} for i in range(100)])
+    encoded = encode_result("run_sql_query", payload, budget=300)
+    result = json.loads(encoded)
+    assert estimate_tokens(encoded) <= 300
+    assert result["truncated"] is True
+    assert result["count"] == 100
+    assert 0 < len(result["rows"]) < 100
+    assert result["rows"] == payload["rows"][: len(result["rows"])]
+
+
+def test_encode_result_trims_lists_to_budget():
+    items = [{"sid": f"SM{i}", "body": "b" * 100} for i in range(100)]
+    encoded = encode_result("list_messages", items, budget=300)
+    result = json.loads(encoded)
+    assert estimate_tokens(encoded) <= 300
+    assert result["truncated"] is True
+    assert result["total"] == 100
+    assert 0 < len(result["items"]) < 100
+
+
+@pytest.mark.parametrize("length", [1000, 100000])
+def test_encode_result_shortens_values_of_other_payloads(length):
+    encoded = encode_result("other", {"a": "y" * length, "b": [1, 2]}, budget=100)
+    result = json.loads(encoded)
+    assert estimate_tokens(encoded) <= 100
+    assert result["a"].endswith(f"…[{length} chars]")
+    assert result["b"] == [1, 2]
+
+
+def test_encode_result_wraps_unshrinkable_payloads_in_valid_json():
+    encoded = encode_result("other", {f"key{i}": i for i in range(5000)}, budget=100)
+    result = json.loads(encoded)
+    assert result["truncated"] is True
+    assert estimate_tokens(encoded) <= 100
+
+
+def test_encode_result_trims_grouped_rows_per_group():
+    payload = {
+        "member": compact_rows([{"id": str(i), "name": f"Member {i}", "email": f"m{i}@example.com"} for i in range(100)]),
+        "program": compact_rows([{"id": "p1", "name": "Kids Karate"}]),
+    }
+    encoded = encode_result("search_records", payload)
+    result = json.loads(encoded)
+    assert estimate_tokens(encoded) <= 500
+    assert result["member"]["truncated"] is True
+    assert result["member"]["count"] == 100
+    assert 0 < len(result["member"]["rows"]) < 100
+    assert result["program"] == payload["program"]
@@ -0,0 +1,97 @@
+import pytest
+
+from src.db.search_service import FuzzyIndex, SearchService, escape_like
+
+
+ENTRIES = [
+    {"type": "location", "id": "1", "name": "Northside Dojo"},
+    {"type": "location", "id": "2", "name": "Downtown"},
+    {"type": "program", "id": "3", "name": "Krav Maga Adults"},
+    {"type": "program", "id": "4", "name": "Kids Karate"},
+]
+
+
+class StubSearchService(SearchService):
+    """SearchService with the database lookups replaced by fixed data."""
+
+    def __init__(self):
+        super().__init__(db_engine=None)
+        self.member_calls = []
+
+    def get_reference_index(self, organization_id):
+        return FuzzyIndex(ENTRIES)
+
+    def search_members(self, term, organization_id, limit=5):
+        self.member_calls.append((term, organization_id, limit))
+        return [{"type": "member", "id": "9", "name": "Kim Park", "email": None, "score": 0.4}]
+
+
+def test_fuzzy_index_ranks_closest_match_first():
+    matches = FuzzyIndex(ENTRIES).search("krav")
+    assert matches[0]["id"] == "3"
+
+
+def test_fuzzy_index_matches_misspellings_and_word_order():
+    assert FuzzyIndex(ENTRIES).search("north side")[0]["id"] == "1"
+    assert FuzzyIndex(ENTRIES).search("karate kid")[0]["id"] == "4"
+
+
+def test_fuzzy_index_returns_nothing_for_unrelated_terms():
+    assert FuzzyIndex(ENTRIES).search("xyz") == []
+
+
+def test_search_groups_results_by_kind():
+    results = StubSearchService().search("kar", "org-1")
+    assert set(results) == {"location", "program", "member"}
+    assert [match["id"] for match in results["program"]][:1] == ["4"]
+    assert results["member"][0]["id"] == "9"
+    assert all("type" not in match for matches in results.values() for match in matches)
+
+
+def test_search_restricted_to_one_kind_skips_members():
+    service = StubSearchService()
+    assert set(service.search("krav", "org-1", kind="program")) == {"program"}
+    assert service.member_calls == []
+
+
+def test_search_requires_organization_id():
+    with pytest.raises(ValueError, match="organization_id"):
+        StubSearchService().search("krav", None)
+
+
+class FakeConnection:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params):
+        self.calls.append(params)
+        return self
+
+    def fetchall(self):
+        return []
+
+
+class FakeEngine:
+    def __init__(self):
+        self.calls = []
+
+    def connect(self):
+        return FakeConnection(self.calls)
+
+
+def test_escape_like():
+    assert escape_like("50%_off\\") == "50\\%\\_off\\\\"
+
+
+@pytest.mark.parametrize("term", ["%", "_", "a\\"])
+def test_search_members_matches_wildcards_literally(term):
+    engine = FakeEngine()
+    SearchService(engine).search_members(term, "org-1")
+    assert engine.calls[0]["pattern"] == f"%{escape_like(term)}%"
+    assert engine.calls[0]["term"] == term
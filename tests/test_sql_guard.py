@@ -0,0 +1,204 @@
+import pytest
+
+from src.agent.sql_guard import SqlGuard, SqlGuardError, normalize_query, split_statements
+
+
+@pytest.fixture
+def guard():
+    return SqlGuard(db_engine=None, max_cost=1000, max_rows=100, default_limit=50)
+
+
+class FakeResult:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def scalar(self):
+        return self.plan
+
+
+class FakeConnection:
+    """Answers EXPLAIN with a fixed plan and records the statements it was given."""
+
+    def __init__(self, cost, rows):
+        self.plan = [{"Plan": {"Total Cost": cost, "Plan Rows": rows}}]
+        self.statements = []
+
+    def execute(self, clause):
+        self.statements.append(str(clause))
+        return FakeResult(self.plan)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT * FROM members WHERE notes = 'a--b'",
+        "SELECT * FROM members WHERE notes = 'a/*b*/c'",
+        "SELECT * FROM members WHERE notes = 'it''s; fine'",
+        "SELECT * FROM members WHERE notes = E'a\\'; b'",
+        'SELECT "drop;--" FROM members',
+        "SELECT $$a;b$$",
+        "SELECT $tag$ it's -- $$ ; $tag$",
+    ],
+)
+def test_validate_keeps_literals_intact(guard, query):
+    assert guard.validate(query) == query
+
+
+def test_validate_strips_comments_and_trailing_semicolon(guard):
+    assert guard.validate("SELECT 1 -- note\n/* outer /* inner */ */;") == "SELECT 1"
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT '--'; DROP TABLE members",
+        "SELECT '/*'; DROP TABLE members; --*/",
+        "SELECT $$x$$; DELETE FROM members",
+        'SELECT "a;"; DROP TABLE members',
+        "SELECT 1; SELECT 2",
+    ],
+)
+def test_validate_rejects_multiple_statements(guard, query):
+    with pytest.raises(SqlGuardError, match="one statement"):
+        guard.validate(query)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "DROP TABLE members",
+        "WITH d AS (DELETE FROM members RETURNING *) SELECT * FROM d",
+        "TRUNCATE members",
+        "UPDATE members SET active = false",
+        "WITH x AS (SELECT 1) UPDATE members SET active = false",
+        "EXPLAIN ANALYZE SELECT * FROM members, programs",
+        "EXPLAIN (ANALYZE, BUFFERS) UPDATE members SET active = false WHERE id = 1",
+        "SELECT * FROM members /* ; */ WHERE 1 = 1; DROP TABLE members",
+    ],
+)
+def test_validate_rejects_destructive_statements(guard, query):
+    with pytest.raises(SqlGuardError):
+        guard.validate(query)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "UPDATE members SET active = false, note = (SELECT x FROM y WHERE z = 1)",
+        "WITH u AS (UPDATE members SET active = false RETURNING id) SELECT * FROM u WHERE id = 1",
+        "WITH u AS (UPDATE members SET a = (SELECT 1 WHERE true) RETURNING id) SELECT * FROM u",
+    ],
+)
+def test_validate_requires_where_at_the_update_level(guard, query):
+    with pytest.raises(SqlGuardError, match="WHERE"):
+        guard.validate(query)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "INSERT INTO members (email) VALUES ('a@b.c') ON CONFLICT (email) DO UPDATE SET active = true",
+        "SELECT * FROM members WHERE id = 1 FOR UPDATE",
+        "SELECT * FROM members WHERE id = 1 FOR NO KEY UPDATE",
+        "WITH u AS (UPDATE members SET active = true WHERE id = 1 RETURNING id) SELECT * FROM u",
+        "UPDATE members SET note = (SELECT x FROM y WHERE z = 1) WHERE id = 2",
+    ],
+)
+def test_validate_allows_filtered_updates_and_upserts(guard, query):
+    assert guard.validate(query) == query
+
+
+def test_validate_rejects_select_into(guard):
+    with pytest.raises(SqlGuardError, match="INTO"):
+        guard.validate("SELECT * INTO newtable FROM members")
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity",
+        "SELECT dblink_exec('dbname=x', 'DROP TABLE members')",
+        "SELECT set_config('statement_timeout', '0', true)",
+        "SELECT pg_sleep(600)",
+    ],
+)
+def test_validate_rejects_admin_functions(guard, query):
+    with pytest.raises(SqlGuardError, match="Administrative functions"):
+        guard.validate(query)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT 'unterminated",
+        'SELECT "unterminated',
+        "SELECT $$unterminated",
+        "SELECT 1 /* unterminated",
+    ],
+)
+def test_validate_rejects_unterminated_input(guard, query):
+    with pytest.raises(SqlGuardError, match="Unterminated"):
+        guard.validate(query)
+
+
+def test_keywords_inside_literals_are_ignored(guard):
+    guard.validate("SELECT * FROM notes WHERE body = 'please drop me' AND \"delete\" = 1")
+    guard.validate("UPDATE members SET notes = 'no where here' WHERE id = 1")
+
+
+def test_split_statements():
+    assert split_statements("SELECT ';'; SELECT $$;$$ -- ;\n") == ["SELECT ';'", "SELECT $$;$$"]
+
+
+def test_normalize_query_strips_comments_and_whitespace_but_keeps_literals():
+    assert normalize_query("SELECT *  FROM \"Members\"\n WHERE a = 'x--  Y' AND b = 3 -- c;") == (
+        'select * from "Members" where a = \'x--  Y\' and b = 3'
+    )
+
+
+def test_normalize_query_keeps_limit_values_apart():
+    assert normalize_query("SELECT * FROM members m, members n LIMIT 1") != normalize_query(
+        "SELECT * FROM members m, members n LIMIT 100000000"
+    )
+
+
+def test_check_adds_limit_to_large_reads(guard):
+    connection = FakeConnection(cost=10, rows=5000)
+    statement, limited_to = guard.check(connection, "SELECT * FROM members")
+    assert statement.endswith("LIMIT 50")
+    assert limited_to == 50
+    assert guard.stats["rewritten"] == 1
+
+
+def test_check_does_not_limit_small_reads_or_writes(guard):
+    assert guard.check(FakeConnection(cost=10, rows=5), "SELECT * FROM members") == ("SELECT * FROM members", None)
+    update = "UPDATE members SET active = true WHERE id = 1"
+    assert guard.check(FakeConnection(cost=10, rows=5000), update) == (update, None)
+
+
+def test_check_rejects_expensive_queries(guard):
+    with pytest.raises(SqlGuardError, match="too expensive"):
+        guard.check(FakeConnection(cost=5000, rows=10), "SELECT * FROM members, programs")
+
+
+def test_check_caches_plans_per_normalized_query(guard):
+    connection = FakeConnection(cost=10, rows=5)
+    guard.check(connection, "SELECT * FROM members WHERE id = 1")
+    guard.check(connection, "select *   from members /* note */ where id = 1")
+    assert len(connection.statements) == 1
+    assert guard.stats["plan_cache_hits"] == 1
+
+
+def test_check_does_not_reuse_plans_across_literals(guard):
+    connection = FakeConnection(cost=10, rows=5)
+    guard.check(connection, "SELECT * FROM members m, members n LIMIT 1")
+    guard.check(connection, "SELECT * FROM members m, members n LIMIT 100000000")
+    assert len(connection.statements) == 2
+
+
+def test_check_expires_cached_plans():
+    guard = SqlGuard(db_engine=None, plan_cache_ttl_seconds=0)
+    connection = FakeConnection(cost=10, rows=5)
+    guard.check(connection, "SELECT * FROM members")
+    guard.check(connection, "SELECT * FROM members")
+    assert len(connection.statements) == 2